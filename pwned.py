@@ -10,6 +10,11 @@
 #        in a way to anonymize the pwd itself.
 # Feel free to send me any bug/improvement request. I will try to respond to anyone.
 # 30/12/2021 - Ver 1.3b: Added -z switch (only support single password so far...)
+# 19/10/2026 - Ver 1.4: Added -c and -r switches to checkpoint and resume long -f/-t scans (local db or web)
+# 19/10/2026 - Ver 1.5: Added -i switch to read passwords/hashes from stdin and write results to stdout (pipelines)
+# 19/10/2026 - Ver 1.6: Lookup planner: picks how to search (web by prefix, sorted file probes, one pass scan, zip scan)
+#                       from the batch size and the local files available. -z now works with -f/-t/-i too.
+# 19/10/2026 - Ver 1.7: Added -k switch: web answers are kept in a local cache file and reused until they expire
 
 import hashlib
 import requests
@@ -19,12 +24,18 @@ import getopt
 import time
 import threading
 import zipfile
+import json
+import queue
+import math
+import sqlite3
+import zlib
 
-PROGRAM_VERSION="1.3b"
+PROGRAM_VERSION="1.7"
 DEBUG_MODE = False
 SSL_CHECK  = False
 
 HASH_PREFIX_LENGHT  = 5
+SHA1_HEX_LENGTH     = 40
 BASE_PWD_SEARCH_URL = 'https://api.pwnedpasswords.com/range/'
 
 #type of expected inputs for the scrypt
@@ -32,6 +43,7 @@ IM_UNKNOWN_MODE     = 0
 IM_SINGLE_PASSOWRD  = 1 #a single password provided in the command line - can be plain text or sha1 hash depending on OPERATION_MODE
 IM_PASSWORD_FILE    = 2 #a file containing password (one per line)
 IM_TEXT_FILE        = 3 #a text file containing words that will be extracted as password (with some filter explained in command line help)
+IM_STDIN            = 4 #passwords (one per line) streamed on stdin, results streamed on stdout
 
 #work with plain text or SHA1 passwords (-s flag)
 OM_PLAIN            = 1 #all password are provided to the script as plain text ... input password may be logged or showed on screen beware where you use this...
@@ -43,7 +55,7 @@ DB_WEB              = 1
 DB_LOCAL            = 2
 DB_LOCAL_ZIP        = 3
 
-INPUT_MODES     = [IM_SINGLE_PASSOWRD, IM_PASSWORD_FILE, IM_TEXT_FILE]
+INPUT_MODES     = [IM_SINGLE_PASSOWRD, IM_PASSWORD_FILE, IM_TEXT_FILE, IM_STDIN]
 OPERATION_MODES = [OM_PLAIN, OM_HASH]
 DATABASE_MODES  = [DB_WEB, DB_LOCAL, DB_LOCAL_ZIP]
 
@@ -53,12 +65,59 @@ ERR_OTHERS           = 2
 ERR_OPMODE_UNKNOWN   = 3
 ERR_NO_HASH_PASSWORD = 4
 
+#checkpoint/resume for -f and -t (see -c and -r switches)
+CHECKPOINT_VERSION       = 2
+CHECKPOINT_EVERY_SECS    = 60       #min secs between two checkpoints
+CHECKPOINT_CHECK_LINES   = 100000   #local db: lines scanned between two looks at the clock
+
+#streaming mode (-i): stdin is read in micro-batches, each batch is checked and written to stdout as soon as it is resolved
+STREAM_SOURCE_NAME    = "stdin"  #used as found_filename in the output
+STREAM_BATCH_SIZE     = 1000     #max passwords in a micro-batch checked with web requests or sorted file probes
+STREAM_BATCH_MAX_WAIT = 0.5      #secs: such a batch is resolved at most this long after its first password arrived
+STREAM_SCAN_BATCH_SIZE = 1000000 #max passwords in a micro-batch checked with a scan (one pass over the db per batch)
+
+#lookup strategies chosen by planLookup
+PLAN_WEB_BY_PREFIX  = 1 #web service, one request per distinct 5 chars prefix
+PLAN_LOCAL_PROBE    = 2 #binary search of each hash in a local file sorted by hash
+PLAN_LOCAL_SCAN     = 3 #one pass over the local file, each line looked up in the set of hashes to check
+PLAN_ZIP_SCAN       = 4 #same as PLAN_LOCAL_SCAN, reading the file from inside the zip
+PLAN_NAMES          = {PLAN_WEB_BY_PREFIX: "web by prefix", PLAN_LOCAL_PROBE: "sorted file probes", \
+                       PLAN_LOCAL_SCAN: "local file scan", PLAN_ZIP_SCAN: "zip file scan"}
+
+#rough costs used by the planner to estimate how long a strategy takes
+COST_WEB_REQUEST_SECS   = 0.3     #one range request to the web service (plus -d delay)
+COST_PROBE_SEEK_SECS    = 0.001   #one seek+readline in a local file (binary search step)
+COST_SCAN_BYTES_PER_SEC = 50e6    #local file read, decoded and looked up line by line
+COST_ZIP_BYTES_PER_SEC  = 30e6    #same, but decompressing from a zip
+SORTED_CHECK_SAMPLES    = 32      #lines sampled to double check a local file said to be sorted by hash (--sorted_db)
+
+#persistent cache of the web service answers (-k switch): one compressed row per 5 chars prefix (so at most 16^5 rows)
+WEB_CACHE_TTL_SECS      = 7*24*3600          #default: after this an answer is revalidated with the web service
+WEB_CACHE_MAX_BYTES     = 1024*1024*1024     #default: least recently used answers are removed above this file size
+WEB_CACHE_EVICT_TO      = 0.9                #eviction stops when the cache is back to this fraction of the max size
+WEB_CACHE_EVICT_ROWS    = 100                #answers removed at a time before measuring the file again
+WEB_CACHE_USED_FLUSH    = 1000               #cache hits whose last_used is kept in memory before writing it to the file
+WEB_CACHE_BUSY_SECS     = 30                 #secs to wait for another run writing to the same cache file
+WEB_REQUEST_TIMEOUT     = 30                 #secs to wait for the web service before giving up
+WEB_STATUS_NO_ANSWER    = 0                  #status used by getRangeRemote when the web service could not be reached
+
 #Global statistics:
 g_number_of_password_read = 0   #1 if from command 
 g_pwned_passwords_found   = 0
 g_safe_passwords_found    = 0
 g_scanned_lines_in_db     = 0  #if local db option used
 g_safe_passwords_invalid  = 0
+g_web_cache_hits          = 0  #web answers served from the -k cache without any request
+
+#web cache (-k switch) - set by openWebCache
+g_web_cache               = None
+g_web_cache_ttl_secs      = WEB_CACHE_TTL_SECS
+g_web_cache_max_bytes     = WEB_CACHE_MAX_BYTES
+g_web_cache_used          = {}  #prefix -> last_used not yet written to the file (see webCacheFlushUsed)
+
+#size and "sorted by hash" flag of the local files, so they are looked at only once per run (see getLocalDbFacts)
+g_local_db_facts          = {}
+g_local_db_sorted         = False #--sorted_db: the user says the -l file is sorted by hash, so it can be probed
 
 
 #Constants for the -f implementation....
@@ -119,6 +178,13 @@ class password_record:
         self.found_linenumber = found_linenumber
         self.ispwned = ispwned
 
+class lookup_plan:
+    def __init__(self, strategy, local_db_file, local_zip, estimated_secs):
+        self.strategy = strategy
+        self.local_db_file = local_db_file  #file to probe/scan (or name of the file inside the zip)
+        self.local_zip = local_zip          #only for PLAN_ZIP_SCAN
+        self.estimated_secs = estimated_secs
+
 def printStats():
     print("---------------------------------------------------------------")
     print("Total number of passwords/hash read.......: " + str(g_number_of_password_read))
@@ -126,6 +192,7 @@ def printStats():
     print("Total number of passwords/hash safe.......: " + str(g_safe_passwords_found))
     print("Total number of passwords/hash invalid....: " + str(g_safe_passwords_invalid))
     print("Total number of lines scanned in local db : " + str(g_scanned_lines_in_db))
+    print("Total number of web answers from cache....: " + str(g_web_cache_hits))
     print("---------------------------------------------------------------")
     return 
 
@@ -178,11 +245,14 @@ def writeOneRecord(l_outputfilename, l_myrecord):
     return
 
 
+def formatOnePassword(found_filename, src_password, src_hash, found_linenumber, i_ispwned ):
+    return found_filename + ", " + str(found_linenumber) + ","+  src_password + ", " + src_hash  + "," + str(i_ispwned) + "\n"
+
 def writeOnePassword(l_outputfilename, found_filename, src_password, src_hash, found_linenumber, i_ispwned ):
     debugLog("writeOnePassword("+ l_outputfilename + ", " + found_filename + ","+  src_password + ", " + src_hash + ", " + str(found_linenumber) + "," + str(i_ispwned)+ ")")
 
     if (l_outputfilename != ""):
-        line_output=found_filename + ", " + str(found_linenumber) + ","+  src_password + ", " + src_hash  + "," + str(i_ispwned) + "\n"
+        line_output=formatOnePassword(found_filename, src_password, src_hash, found_linenumber, i_ispwned)
         l_outfile = open(l_outputfilename, 'a', newline='\n')
         
         l_outfile.writelines(line_output)
@@ -192,6 +262,96 @@ def writeOnePassword(l_outputfilename, found_filename, src_password, src_hash, f
 
     return
 
+#[size, mtime in ns] of a file, None if it does not exist: tells if a file changed since a checkpoint was written
+def fileStamp(l_filename):
+    if (l_filename == "") or not(os.path.isfile(l_filename)):
+        return None
+    file_stat = os.stat(l_filename)
+    return [file_stat.st_size, file_stat.st_mtime_ns]
+
+#What a checkpoint belongs to: input file, local db (the zip with -z) and their size/mtime. A checkpoint is only
+#used if all of them are still the same, otherwise its pwned positions would be applied to the wrong records.
+def checkpointJob(l_list_of_records, l_db_file, l_local_zip=""):
+    input_file = l_list_of_records[0].found_filename if len(l_list_of_records) > 0 else ""
+    return {
+        "input_file"      : input_file,
+        "input_stamp"     : fileStamp(input_file),
+        "total_records"   : len(l_list_of_records),
+        "db_file"         : l_db_file,
+        "local_zip"       : l_local_zip,
+        "db_stamp"        : fileStamp(l_local_zip if l_local_zip != "" else l_db_file)
+    }
+
+#A checkpoint records where a -f/-t scan was: byte offset/line in the local db, position in the input list,
+#which records are already known as pwned and how big the output file was. Written to a temp file and then
+#renamed so a crash while writing never leaves a broken checkpoint behind.
+#l_pwned_positions is kept up to date by the caller, so writing a checkpoint does not walk the whole input list.
+def writeCheckpoint(l_checkpoint_file, l_list_of_records, l_pwned_positions, l_db_file, l_db_offset, l_db_line, l_input_position, l_outputfilename, l_local_zip=""):
+    if (l_checkpoint_file == ""):
+        return
+    output_offset = 0
+    if (l_outputfilename != "") and os.path.exists(l_outputfilename):
+        output_offset = os.path.getsize(l_outputfilename)
+    checkpoint = checkpointJob(l_list_of_records, l_db_file, l_local_zip)
+    checkpoint.update({
+        "version"         : CHECKPOINT_VERSION,
+        "db_offset"       : l_db_offset,
+        "db_line"         : l_db_line,
+        "input_position"  : l_input_position,
+        "output_offset"   : output_offset,
+        "pwned_positions" : l_pwned_positions
+    })
+    temp_file = l_checkpoint_file + ".tmp"
+    with open(temp_file, 'w') as ckpt:
+        json.dump(checkpoint, ckpt)
+    os.replace(temp_file, l_checkpoint_file)
+    debugLog("writeCheckpoint: db_offset=" + str(l_db_offset) + " db_line=" + str(l_db_line) + " input_position=" + str(l_input_position))
+    return
+
+#Empties the output file: results of a previous run that cannot be resumed would end up mixed with the new ones
+def truncateOutputFile(l_outputfilename, l_size=0):
+    if (l_outputfilename != "") and os.path.exists(l_outputfilename):
+        with open(l_outputfilename, 'r+') as outfile:
+            outfile.truncate(l_size)
+    return
+
+#Returns (db_offset, db_line, input_position, pwned_positions) and marks as pwned the records already found.
+#If the checkpoint is missing or does not match the current job, everything restarts from scratch: (0, 0, 0, [])
+def readCheckpoint(l_checkpoint_file, l_list_of_records, l_db_file, l_outputfilename, l_local_zip=""):
+    debugLog("readCheckpoint(" + l_checkpoint_file + "," + l_db_file + "," + l_outputfilename + "," + l_local_zip + ")")
+    if not(os.path.exists(l_checkpoint_file)):
+        print("No checkpoint found in " + l_checkpoint_file + " - starting from scratch")
+        truncateOutputFile(l_outputfilename)
+        return 0, 0, 0, []
+    try:
+        with open(l_checkpoint_file, 'r') as ckpt:
+            checkpoint = json.load(ckpt)
+    except (OSError, ValueError) as err:
+        print("Checkpoint " + l_checkpoint_file + " is not readable (" + str(err) + ") - starting from scratch")
+        truncateOutputFile(l_outputfilename)
+        return 0, 0, 0, []
+
+    current_job = checkpointJob(l_list_of_records, l_db_file, l_local_zip)
+    if (checkpoint.get("version") != CHECKPOINT_VERSION) or \
+       any(checkpoint.get(key) != value for key, value in current_job.items()):
+        print("Checkpoint " + l_checkpoint_file + " belongs to a different job - starting from scratch")
+        truncateOutputFile(l_outputfilename)
+        return 0, 0, 0, []
+
+    for position in checkpoint["pwned_positions"]:
+        l_list_of_records[position].ispwned = True
+    #drop anything written to the output after the checkpoint, it will be written again
+    truncateOutputFile(l_outputfilename, checkpoint["output_offset"])
+    print("Resuming from checkpoint " + l_checkpoint_file + ": db line " + str(checkpoint["db_line"]) + ", input record " + \
+        str(checkpoint["input_position"]) + ", " + str(len(checkpoint["pwned_positions"])) + " pwned so far")
+    return checkpoint["db_offset"], checkpoint["db_line"], checkpoint["input_position"], checkpoint["pwned_positions"]
+
+def removeCheckpoint(l_checkpoint_file):
+    if (l_checkpoint_file != "") and os.path.exists(l_checkpoint_file):
+        os.remove(l_checkpoint_file)
+        debugLog("removeCheckpoint: job completed, " + l_checkpoint_file + " removed")
+    return
+
 # press any key to continue function
 def pressAnyKey(theprompt="Press any key to continue...", failChars='qQ'):
     '''
@@ -221,7 +381,7 @@ def showHelpShort():
     print("pwned --help")
 
 def showHelp():
-    print("Usage: pwned [-p password_to_check]|[-f pwds_filename]|[-t text_filename] [-s] [-l sha1_pwned_pwd_file] -d secs| [-h]")
+    print("Usage: pwned [-p password_to_check]|[-f pwds_filename]|[-t text_filename]|[-i] [-s] [-l sha1_pwned_pwd_file] -d secs| [-h]")
     print("       pwned [--password password_to_check]|[-password_file pwds_filename]|[-text_file text_filename] [--sha1_format] [--local_sha1_db sha1_pwned_pwd_file] --delay secs | [--help]")
     print("-----------------------------------------------------------------------------------------------------------------------")    
     print("\nCheck a password or a list of password against a DB of breaches maintained at https://haveibeenpwned.com/Passwords")
@@ -238,12 +398,22 @@ def showHelp():
     print("pwned -p B0399D2029F64D445BD131FFAA399A42D2F8E7DC -s -o thisiswhativefound.txt")
     print("pwned -f file_with_passwords.txt -o thisiswhativefound.txt")
     print("pwned -f file_with_passwords_insha1_format.txt -s -o thisiswhativefound.txt")
+    print("pwned -f file_with_passwords.txt -l hashtest.txt -c scan.ckpt -o thisiswhativefound.txt")
+    print("pwned -f file_with_passwords.txt -l hashtest.txt -c scan.ckpt -r -o thisiswhativefound.txt")
+    print("cat hashes_insha1_format.txt | pwned -i -s -l hashtest.txt > thisiswhativefound.txt")
+    print("pwned -f file_with_passwords.txt -k pwned_cache.db --cache_ttl=86400 -o thisiswhativefound.txt")
     print("-----------------------------------------------------------------------------------------------------------------------")
     print(" -p password_to_check (--password)      - password to check")
     print(" -f pwds_filename     (--password_file) - read a text file containing a list of 1 passwords per line (ending in \\n)") 
     print("                                          Each line must contain a plain text password or a SHA1 hash (if -s is used")
     print(" -t text_filename     (--text_file)     - read a text file continaing words. The idea is to implement a pwd parser...") 
     print("                                          -t is NOT YET IMPLEMENTED, same as -f option so far") 
+    print(" -i                   (--stdin)         - read passwords (1 per line, SHA1 if -s is used) from stdin and write")
+    print("                                          results on stdout (same csv format as -o) as soon as they are known.")
+    print("                                          Passwords are checked in batches of up to " + str(STREAM_BATCH_SIZE) + ", waiting at most")
+    print("                                          " + str(STREAM_BATCH_MAX_WAIT) + " secs for a batch to fill. When the local file is scanned")
+    print("                                          a batch takes all passwords read during the previous scan")
+    print("                                          All messages go to stderr")
     print(" -s                   (--sha1_format)   - inputs (from command line or files) is expected to be a SHA1 hex string")
     print("                                         lines beginning with # are skipped  - NOT IMPLEMENTED YET") 
     print("                                         lines containing *** # are skipped  - NOT IMPLEMENTED YET")
@@ -253,11 +423,28 @@ def showHelp():
     print("                                          Tested with the list of SHA1 passwords obtained from:")
     print("                                          https://haveibeenpwned.com/Passwords")
     print(" -z zip_filename      (--zipped)        - if the text file defined with -l is contained in the zip_filename")
+    print("                                          How the local file is searched (binary search if sorted by hash, or one")
+    print("                                          pass scan, zipped or not) is chosen automatically from the number of")
+    print("                                          passwords and the files available. The choice is printed as 'Lookup plan'")
+    print(" --sorted_db                            - the -l file is sorted by hash (e.g. the \"ordered by hash\" download):")
+    print("                                          allows binary searches instead of reading the whole file. A file that")
+    print("                                          is NOT fully sorted gives wrong answers (pwned passwords found safe)")
     print(" -d secs_number       (--delay)         - when using the web server (i.e. if -l NOT used) requests are delayed")
     print("                                          (throtthled) by secs_number seconds. Ignored with -l")
+    print(" -k cache_filename    (--web_cache)     - keep the web service answers in cache_filename and reuse them in the")
+    print("                                          next runs. Answers older than --cache_ttl secs (default " + str(WEB_CACHE_TTL_SECS) + ")")
+    print("                                          are checked again with the web service. The space used in the file")
+    print("                                          (answers and sqlite overhead) is kept below --cache_max_mb MB")
+    print("                                          (default " + str(WEB_CACHE_MAX_BYTES // (1024*1024)) + ") removing the least used answers. Needs -k")
     print(" -h                   (--help)          - print this message... override all other parameters")
     print(" -o out_filename      (--output_file )  - Write all passwords and the search result in the file named out_filename.")
     print("                                          If -s is used no passwords will be in the file")
+    print(" -c ckpt_filename     (--checkpoint)    - with -f or -t save progress (db offset, found pwds, input position) in")
+    print("                                          ckpt_filename every " + str(CHECKPOINT_EVERY_SECS) + " secs. Removed when the scan completes")
+    print(" -r                   (--resume)        - continue a -f or -t scan from the checkpoint in the -c file (-c needed).")
+    print("                                          -o file is kept up to the checkpoint. Without a usable checkpoint")
+    print("                                          (e.g. the input, -l or -z file changed since it was written)")
+    print("                                          the -o file is erased and the scan starts from scratch")
     print("-----------------------------------------------------------------------------------------------------------------------")
     print("Output file (if used) is a csv file containing:")
     print("       source_file_name, line_number_in_src_file, plain_text_pwd_if_available, Sha1-version_of_the_pwd, True|False")
@@ -291,20 +478,14 @@ def checkSinglePassword(l_password, l_current_input_mode, l_current_db_mode, l_c
         password_in_text_format = l_password
         password_in_hash_format = hashMeThis(l_password)
     
-    is_pwned = False
-    if (l_current_db_mode == DB_WEB):
-        is_pwned=isHashPwnedRemote(password_in_hash_format)
-    elif (l_current_db_mode == DB_LOCAL_ZIP):
-        is_pwned=isHashPwnedLocalZip(password_in_hash_format, l_cli_local_db_file, l_cli_local_zip)
-    else:
-        is_pwned=isHashPwnedLocal(password_in_hash_format, l_cli_local_db_file)
-    
-    writeOnePassword(l_cli_output_file, "cli", password_in_text_format, password_in_hash_format, 0, is_pwned )
+    current = password_record(password_in_text_format, password_in_hash_format, "cli", 0, False)
+    the_plan = planLookup([current], l_current_db_mode, l_cli_local_db_file, l_cli_local_zip)
+    checkListWithPlan([current], the_plan, l_cli_output_file)
    
     return
 
-def checkPlainPasswordFile(l_cli_password_file, l_current_db_mode, l_cli_local_db_file, l_cli_output_file, l_inputmode=OM_PLAIN, l_delay_secs=0):
-    debugLog("checkPlainPasswordFile(" + l_cli_password_file + "," + str(l_current_db_mode) + "," +l_cli_local_db_file + "," + l_cli_output_file +","+ str(l_inputmode) + "," + str(l_delay_secs)+")")
+def checkPlainPasswordFile(l_cli_password_file, l_current_db_mode, l_cli_local_db_file, l_cli_output_file, l_inputmode=OM_PLAIN, l_delay_secs=0, l_checkpoint_file="", l_resume=False, l_cli_local_zip=""):
+    debugLog("checkPlainPasswordFile(" + l_cli_password_file + "," + str(l_current_db_mode) + "," +l_cli_local_db_file + "," + l_cli_output_file +","+ str(l_inputmode) + "," + str(l_delay_secs)+ "," + l_checkpoint_file + "," + str(l_resume) + "," + l_cli_local_zip + ")")
 
     global g_number_of_password_read
     global g_pwned_passwords_found
@@ -313,150 +494,343 @@ def checkPlainPasswordFile(l_cli_password_file, l_current_db_mode, l_cli_local_d
     list_to_check = []  
     list_to_check = readTextPasswordFromTextFile(l_cli_password_file, l_inputmode)
     g_number_of_password_read = len(list_to_check)
-    if (l_current_db_mode == DB_WEB):
-        for current in list_to_check:
-            current.ispwned=isHashPwnedRemote(current.src_hash)
-            writeOneRecord(l_cli_output_file, current)
-            time.sleep(l_delay_secs)
-            debugLog("Throttling requests by secs:" + str(l_delay_secs))
-    else:
-        #isHashListPwnedLocalMT(list_to_check, l_cli_local_db_file, l_cli_output_file, OM_PLAIN)
-        #below  is the working version...
-        isHashListPwnedLocal(list_to_check, l_cli_local_db_file, l_cli_output_file, OM_PLAIN)
+    #isHashListPwnedLocalMT(list_to_check, l_cli_local_db_file, l_cli_output_file, OM_PLAIN) is not used anymore
+    the_plan = planLookup(list_to_check, l_current_db_mode, l_cli_local_db_file, l_cli_local_zip, l_delay_secs)
+    checkListWithPlan(list_to_check, the_plan, l_cli_output_file, l_delay_secs, l_checkpoint_file, l_resume)
     return 
 
-def checkTextFile(l_word_list, l_current_db_mode, l_cli_local_db_file, l_cli_output_file, l_delay_secs):
-    debugLog("checkTextFile(l_word_list, " + str(l_current_db_mode) + "," + l_cli_local_db_file + "," + l_cli_output_file + ")")
+def checkTextFile(l_word_list, l_current_db_mode, l_cli_local_db_file, l_cli_output_file, l_delay_secs, l_checkpoint_file="", l_resume=False, l_cli_local_zip=""):
+    debugLog("checkTextFile(l_word_list, " + str(l_current_db_mode) + "," + l_cli_local_db_file + "," + l_cli_output_file + "," + l_checkpoint_file + "," + str(l_resume) + "," + l_cli_local_zip + ")")
     global g_number_of_password_read
     global g_pwned_passwords_found
     global g_safe_passwords_found
     
     list_to_check = l_word_list
     g_number_of_password_read = len(list_to_check)
-    if (l_current_db_mode == DB_WEB):
-        for current in list_to_check:
-            current.ispwned=isHashPwnedRemote(current.src_hash)
-            writeOneRecord(l_cli_output_file, current)
-            time.sleep(l_delay_secs)
-            debugLog("Throttling requests by secs:" + str(l_delay_secs))
-    else:
-        isHashListPwnedLocal(list_to_check, l_cli_local_db_file, l_cli_output_file, OM_PLAIN)
+    the_plan = planLookup(list_to_check, l_current_db_mode, l_cli_local_db_file, l_cli_local_zip, l_delay_secs)
+    checkListWithPlan(list_to_check, the_plan, l_cli_output_file, l_delay_secs, l_checkpoint_file, l_resume)
     return 
 
-#added on 2021/12/27 to read from a zipped file....
-def isHashPwnedLocalZip(l_hash, l_local_db_file, l_local_zip_file):
-    debugLog("isHashPwnedLocalZip(" + l_hash + "," + l_local_db_file + ", " + l_local_zip_file + ")")
-    result= False
-    line_number=0
-    global g_number_of_password_read
-    global g_pwned_passwords_found
-    global g_safe_passwords_found
-    global g_scanned_lines_in_db
-    last_digit = 0
-
-
-    with zipfile.ZipFile(l_local_zip_file) as z:
-        with z.open(l_local_db_file) as f:
-            debugLog("isHashPwnedLocalZip-zip file is now open...:" + l_local_zip_file + ")")
-            for the_line in f:
-                line_number = line_number + 1
-                if (l_hash.encode() in the_line):
-                    g_number_of_password_read = 1
-                    g_pwned_passwords_found   = 1
-                    g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
-                    g_scanned_lines_in_db     = line_number 
-                    result=True
-                    print(l_hash + " FOUND on line " + str(line_number) + " of file " + l_local_db_file)
-                    debugLog("isHashPwnedLocalZip result=" + str(result));
-                    return result
-                if (line_number % 100000) == 0:
-                    last_digit = (last_digit+1) % 10
-                    print(str(last_digit), end='', flush= True)
-        
-    g_number_of_password_read = 1
-    g_pwned_passwords_found   = 0
-    g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
-    g_scanned_lines_in_db     = line_number                 
-    return result
+#Returns the first ':' separated field of a local db line, upper case (i.e. the hash in the HIBP "hash:count" format)
+def hashOfDbLine(l_raw_line):
+    return l_raw_line.split(b":", 1)[0].strip().decode('utf-8', errors='ignore').upper()
+
+#True if the local file looks sorted by hash: SORTED_CHECK_SAMPLES lines taken at regular offsets must all start
+#with a SHA1 and be in increasing order. Files with other formats (e.g. something:hash:plain) are never "sorted".
+#Only a sanity check of --sorted_db: a few lines in order do not prove that the whole file is (one line out of
+#place is enough for a binary search to miss a pwned password), so without --sorted_db the file is always scanned.
+def isLocalDbSorted(l_local_db_file, l_file_size):
+    previous_hash = ""
+    with open(l_local_db_file, 'rb') as read_obj:
+        for sample in range(SORTED_CHECK_SAMPLES):
+            offset = (l_file_size * sample) // SORTED_CHECK_SAMPLES
+            read_obj.seek(offset)
+            if offset > 0:
+                read_obj.readline() #skip the partial line
+            the_hash = hashOfDbLine(read_obj.readline())
+            if the_hash == "":
+                break #end of file
+            if (len(the_hash) != SHA1_HEX_LENGTH) or (the_hash < previous_hash):
+                debugLog("isLocalDbSorted: " + l_local_db_file + " is NOT sorted by hash (" + the_hash + " at offset " + str(offset) + ")")
+                return False
+            previous_hash = the_hash
+    return True
+
+#Returns (size, is_sorted) of the local db: the uncompressed size with a zip (never "sorted", it cannot be probed).
+#is_sorted is only True with --sorted_db, and if the sampled lines agree.
+#Computed once per file and kept in g_local_db_facts, -i asks for it at every batch.
+def getLocalDbFacts(l_local_db_file, l_local_zip):
+    the_key = (l_local_db_file, l_local_zip)
+    if the_key not in g_local_db_facts:
+        if l_local_zip != "":
+            with zipfile.ZipFile(l_local_zip) as z:
+                file_size = z.getinfo(l_local_db_file).file_size
+            is_sorted = False
+        else:
+            file_size = os.path.getsize(l_local_db_file)
+            is_sorted = g_local_db_sorted and (file_size > 0) and isLocalDbSorted(l_local_db_file, file_size)
+            if g_local_db_sorted and not(is_sorted):
+                print("WARNING: --sorted_db used but " + l_local_db_file + " is NOT sorted by hash - it will be scanned")
+        g_local_db_facts[the_key] = (file_size, is_sorted)
+    return g_local_db_facts[the_key]
+
+def showLookupPlan(l_plan, l_number_of_records):
+    print("Lookup plan for " + str(l_number_of_records) + " password(s): " + PLAN_NAMES[l_plan.strategy] + \
+        " - estimated cost " + "{:.3f}".format(l_plan.estimated_secs) + " secs")
+    return
 
+#Cost based planner: estimates how long each strategy available for the job would take and returns the cheapest.
+#Local files are always preferred to the web service when provided (-l/-z): the planner only chooses HOW to search them.
+#With -z only the zip is used, even if a file with the -l name is also on disk.
+def planLookup(l_list_records, l_current_db_mode, l_cli_local_db_file, l_cli_local_zip, l_delay_secs=0, l_show_plan=True):
+    debugLog("planLookup(" + str(len(l_list_records)) + " records," + str(l_current_db_mode) + "," + l_cli_local_db_file + "," + l_cli_local_zip + "," + str(l_delay_secs) + ")")
+    number_of_records = len(l_list_records)
+    candidates = []
 
-def isHashPwnedLocal(l_hash, l_local_db_file):
-    debugLog("isHashPwnedLocal(" + l_hash + "," + l_local_db_file + ")")
-    result= False
-    line_number=0
+    if (l_current_db_mode == DB_WEB):
+        all_prefixes = set(rec.src_hash[0:HASH_PREFIX_LENGHT].upper() for rec in l_list_records)
+        number_of_prefixes = sum(1 for prefix in all_prefixes if not(isRangeInWebCache(prefix)))
+        candidates.append(lookup_plan(PLAN_WEB_BY_PREFIX, "", "", number_of_prefixes * (COST_WEB_REQUEST_SECS + l_delay_secs)))
+    elif (l_current_db_mode == DB_LOCAL_ZIP):
+        file_size, is_sorted = getLocalDbFacts(l_cli_local_db_file, l_cli_local_zip)
+        candidates.append(lookup_plan(PLAN_ZIP_SCAN, l_cli_local_db_file, l_cli_local_zip, file_size / COST_ZIP_BYTES_PER_SEC))
+    elif (l_cli_local_db_file != "") and os.path.isfile(l_cli_local_db_file):
+        file_size, is_sorted = getLocalDbFacts(l_cli_local_db_file, "")
+        candidates.append(lookup_plan(PLAN_LOCAL_SCAN, l_cli_local_db_file, "", file_size / COST_SCAN_BYTES_PER_SEC))
+        if is_sorted:
+            probes_per_record = math.ceil(math.log2(file_size + 1))
+            candidates.append(lookup_plan(PLAN_LOCAL_PROBE, l_cli_local_db_file, "", number_of_records * probes_per_record * COST_PROBE_SEEK_SECS))
+    else:
+        #nothing usable on disk: let the scan fail with the usual "file not found" error
+        candidates.append(lookup_plan(PLAN_LOCAL_SCAN, l_cli_local_db_file, "", 0))
+
+    the_plan = min(candidates, key=lambda candidate: candidate.estimated_secs)
+    for candidate in candidates:
+        debugLog("planLookup: " + PLAN_NAMES[candidate.strategy] + " estimated " + "{:.3f}".format(candidate.estimated_secs) + " secs")
+    if l_show_plan:
+        showLookupPlan(the_plan, number_of_records)
+    return the_plan
+
+#Runs the plan returned by planLookup. Results are written to l_outputfilename and global stats updated.
+def checkListWithPlan(l_list_records, l_plan, l_outputfilename, l_delay_secs=0, l_checkpoint_file="", l_resume=False):
+    debugLog("checkListWithPlan(" + str(len(l_list_records)) + " records," + PLAN_NAMES[l_plan.strategy] + "," + l_outputfilename + ")")
+    if (l_plan.strategy == PLAN_WEB_BY_PREFIX):
+        isHashListPwnedRemote(l_list_records, l_outputfilename, l_delay_secs, l_checkpoint_file, l_resume)
+    elif (l_plan.strategy == PLAN_LOCAL_PROBE):
+        isHashListPwnedLocalSorted(l_list_records, l_plan.local_db_file, l_outputfilename, l_checkpoint_file, l_resume)
+    else:
+        isHashListPwnedLocal(l_list_records, l_plan.local_db_file, l_outputfilename, OM_PLAIN, l_checkpoint_file, l_resume, l_plan.local_zip)
+    return
+
+#Builds a record from one line read on stdin. Returns None for empty lines.
+def readStreamRecord(l_line, l_line_number, l_inputmode=OM_PLAIN):
+    the_word=l_line.strip()
+    if the_word == "":
+        debugLog("readStreamRecord: Skipping empty line")
+        return None
+    if l_inputmode==OM_PLAIN:
+        return password_record(the_word, hashMeThis(the_word), STREAM_SOURCE_NAME, l_line_number, False)
+    if (len(the_word) != SHA1_HEX_LENGTH) or any(c not in "0123456789abcdefABCDEF" for c in the_word):
+        #same as -p -s: not a SHA1, so it is checked as a plain text password
+        print(STREAM_SOURCE_NAME + "(" + str(l_line_number) + "): " + the_word + " does NOT look as a SHA1 format...proceding as it was plaintext instead...")
+        return password_record(the_word, hashMeThis(the_word), STREAM_SOURCE_NAME, l_line_number, False)
+    return password_record("unknown", the_word.upper(), STREAM_SOURCE_NAME, l_line_number, False)
+
+#runs in its own thread so that the main loop can wait for stdin with a timeout (see STREAM_BATCH_MAX_WAIT)
+def streamReader(l_input_stream, l_line_queue):
+    for l in l_input_stream:
+        l_line_queue.put(l)
+    l_line_queue.put(None) #end of input
+    return
+
+#Reads passwords (or SHA1 with -s) from l_input_stream and writes one csv line per password on l_result_stream
+#(same format as the -o file). Lines are grouped in batches of up to STREAM_BATCH_SIZE, a batch is checked as soon
+#as it is full or STREAM_BATCH_MAX_WAIT secs after its first password, so slow producers still get timely answers.
+#When the plan is a scan, each batch costs a full pass over the db: the next batch then takes everything that was
+#queued while the previous one was being checked (up to STREAM_SCAN_BATCH_SIZE), without waiting for more.
+def checkStream(l_input_stream, l_result_stream, l_current_db_mode, l_cli_local_db_file, l_cli_local_zip, l_cli_output_file, l_inputmode=OM_PLAIN, l_delay_secs=0):
+    debugLog("checkStream(" + str(l_current_db_mode) + "," + l_cli_local_db_file + "," + l_cli_local_zip + "," + l_cli_output_file + "," + str(l_inputmode) + "," + str(l_delay_secs) + ")")
     global g_number_of_password_read
     global g_pwned_passwords_found
     global g_safe_passwords_found
     global g_scanned_lines_in_db
-    last_digit = 0
 
-    with open(l_local_db_file, 'r') as read_obj:
-        for the_line in read_obj:
+    total_read    = 0
+    total_pwned   = 0
+    total_scanned = 0
+    line_number   = 0
+    last_strategy = None #the plan is shown only when it changes from a batch to the next
+    end_of_input  = False
+    scan_batches  = False #True once a batch has been checked with a scan
+
+    #not bounded: while a scan runs the next batch piles up here (in memory, as -f does with the whole file)
+    line_queue = queue.Queue()
+    reader = threading.Thread(target=streamReader, args=(l_input_stream, line_queue), daemon=True)
+    reader.start()
+
+    while not(end_of_input):
+        batch    = []
+        deadline = None #set when the first password of the batch arrives
+        batch_size = STREAM_SCAN_BATCH_SIZE if scan_batches else STREAM_BATCH_SIZE
+        while len(batch) < batch_size:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+            try:
+                if scan_batches and (len(batch) > 0):
+                    the_line = line_queue.get_nowait() #only what is already queued
+                else:
+                    the_line = line_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if the_line is None:
+                end_of_input = True
+                break
             line_number = line_number + 1
-            if (l_hash in the_line):
-                g_number_of_password_read = 1
-                g_pwned_passwords_found   = 1
-                g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
-                g_scanned_lines_in_db     = line_number 
-                result=True
-                print(l_hash + " FOUND on line " + str(line_number) + " of file " + l_local_db_file)
-                return result
-
-            if (line_number % 100000) == 0:
-                last_digit = (last_digit+1) % 10
-                print(str(last_digit), end='', flush= True)
-                    
-    g_number_of_password_read = 1
-    g_pwned_passwords_found   = 0
-    g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
-    g_scanned_lines_in_db     = line_number                 
-    return result
-
+            rec = readStreamRecord(the_line, line_number, l_inputmode)
+            if rec is not None:
+                if deadline is None:
+                    deadline = time.time() + STREAM_BATCH_MAX_WAIT
+                batch.append(rec)
+
+        if len(batch) > 0:
+            the_plan = planLookup(batch, l_current_db_mode, l_cli_local_db_file, l_cli_local_zip, l_delay_secs, False)
+            if the_plan.strategy != last_strategy:
+                showLookupPlan(the_plan, len(batch))
+                last_strategy = the_plan.strategy
+            scan_batches = the_plan.strategy in (PLAN_LOCAL_SCAN, PLAN_ZIP_SCAN)
+            g_scanned_lines_in_db = 0
+            checkListWithPlan(batch, the_plan, "", l_delay_secs)
+            total_scanned = total_scanned + g_scanned_lines_in_db
+            for current in batch:
+                if current.ispwned:
+                    total_pwned = total_pwned + 1
+            writeListOfRecords(l_cli_output_file, batch)
+            try:
+                for current in batch:
+                    l_result_stream.write(formatOnePassword(current.found_filename, current.src_password, current.src_hash, current.found_linenumber, current.ispwned))
+                l_result_stream.flush()
+            except BrokenPipeError:
+                #the reader of stdout went away (e.g. "| head"): nobody wants more results
+                print("checkStream: stdout closed by the reader, stopping")
+                total_read = total_read + len(batch)
+                break
+            total_read = total_read + len(batch)
+            debugLog("checkStream: batch of " + str(len(batch)) + " resolved, " + str(total_read) + " read so far")
+
+    g_number_of_password_read = total_read
+    g_pwned_passwords_found   = total_pwned
+    g_safe_passwords_found    = total_read - total_pwned - g_safe_passwords_invalid
+    g_scanned_lines_in_db     = total_scanned
+    return
 
-def isHashListPwnedLocal(list_records, l_local_db_file, l_outputfilename, l_input_mode):
-    debugLog("isHashListPwnedLocal(" + "list_records" + "," + l_local_db_file + "," + l_outputfilename + "," + str(l_input_mode) + ")")
+def isHashListPwnedLocal(list_records, l_local_db_file, l_outputfilename, l_input_mode, l_checkpoint_file="", l_resume=False, l_local_zip_file=""):
+    debugLog("isHashListPwnedLocal(" + "list_records" + "," + l_local_db_file + "," + l_outputfilename + "," + str(l_input_mode) + "," + l_checkpoint_file + "," + str(l_resume) + "," + l_local_zip_file + ")")
     result= False #True if at least one password is found
     line_number=0
+    db_offset=0   #bytes of the db already scanned (where to seek on resume)
     last_digit=0
     total_records = len(list_records)
     true_records  = 0
+    pwned_positions = []
+    last_checkpoint = time.time()
     global g_number_of_password_read
     global g_pwned_passwords_found
     global g_safe_passwords_found
     global g_scanned_lines_in_db
 
-    with open(l_local_db_file, 'r') as read_obj:
-        for the_line in read_obj:
+    if l_resume:
+        db_offset, line_number, input_position, pwned_positions = readCheckpoint(l_checkpoint_file, list_records, l_local_db_file, l_outputfilename, l_local_zip_file)
+        true_records = len(pwned_positions)
+        result = (true_records > 0)
+
+    #hashes still to be found -> positions of the records with that hash (the same password may be in the input more than once)
+    pending = {}
+    for position, current_record in enumerate(list_records):
+        if current_record.ispwned==False:
+            pending.setdefault(current_record.src_hash.upper(), []).append(position)
+
+    #binary mode so that the byte offset is exact and can be used to seek on resume
+    if l_local_zip_file != "":
+        zip_obj  = zipfile.ZipFile(l_local_zip_file)
+        read_obj = zip_obj.open(l_local_db_file)
+    else:
+        zip_obj  = None
+        read_obj = open(l_local_db_file, 'rb')
+    with read_obj:
+        read_obj.seek(db_offset)
+        for raw_line in read_obj:
             line_number = line_number + 1
-            for current_record in list_records:
-                if (true_records < total_records):
-                    if current_record.ispwned==False:
-                        if (current_record.src_hash in the_line):
-                            result=result or True
+            db_offset   = db_offset + len(raw_line)
+            #any sha1 in the line counts, so both "hash:count" and "something:hash:plain" formats work
+            for field in raw_line.split(b":"):
+                field = field.strip()
+                if len(field) == SHA1_HEX_LENGTH:
+                    found_positions = pending.pop(field.decode('utf-8', errors='ignore').upper(), None)
+                    if found_positions is not None:
+                        result = True
+                        for position in found_positions:
+                            current_record = list_records[position]
+                            pwned_positions.append(position)
                             true_records = true_records + 1
                             current_record.ispwned = True
                             print("\n" + current_record.found_filename + "(" + str(current_record.found_linenumber) + ") -" + \
                                 current_record.src_password + " -" + current_record.src_hash + " FOUND on line " + str(line_number) + \
                                 " of file " + l_local_db_file + " - " + str(total_records-true_records) + " pwds to check...")
-                else:
-                    debugLog("isHashListPwnedLocal: exit and return... no more passwords to check. Total scanned lines: " + str(line_number))
-                    writeListOfRecords(l_outputfilename, list_records)
-                    g_number_of_password_read = total_records
-                    g_pwned_passwords_found   = true_records
-                    g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
-                    g_scanned_lines_in_db     = line_number #if local db option used
-                    return
+            if len(pending) == 0:
+                debugLog("isHashListPwnedLocal: exit... no more passwords to check. Total scanned lines: " + str(line_number))
+                break
             if (line_number % 100000) == 0:
                 last_digit = (last_digit+1) % 10
                 print(str(last_digit), end='', flush= True)
+            if ((line_number % CHECKPOINT_CHECK_LINES) == 0) and (time.time() - last_checkpoint >= CHECKPOINT_EVERY_SECS):
+                writeCheckpoint(l_checkpoint_file, list_records, pwned_positions, l_local_db_file, db_offset, line_number, 0, l_outputfilename, l_local_zip_file)
+                last_checkpoint = time.time()
         print("isHashListPwnedLocal - All passwords checked. Total scanned lines: " + str(line_number))
+    if zip_obj is not None:
+        zip_obj.close()
     writeListOfRecords(l_outputfilename, list_records)
+    removeCheckpoint(l_checkpoint_file)
     g_number_of_password_read = total_records
     g_pwned_passwords_found   = true_records
     g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
     g_scanned_lines_in_db     = line_number #if local db option used
     return result
 
+#Binary search of l_hash in a local file sorted by hash (see isLocalDbSorted). True if found.
+def findHashInSortedFile(l_hash, l_read_obj, l_file_size):
+    #smallest offset whose next full line has a hash >= l_hash: that line is l_hash if l_hash is in the file
+    low  = 0
+    high = l_file_size
+    while low < high:
+        middle = (low + high) // 2
+        l_read_obj.seek(max(middle - 1, 0))
+        if middle > 0:
+            l_read_obj.readline() #move to the start of the next full line
+        the_hash = hashOfDbLine(l_read_obj.readline())
+        if (the_hash == "") or (the_hash >= l_hash):
+            high = middle
+        else:
+            low = middle + 1
+    l_read_obj.seek(max(low - 1, 0))
+    if low > 0:
+        l_read_obj.readline()
+    return hashOfDbLine(l_read_obj.readline()) == l_hash
+
+#Same results as isHashListPwnedLocal, but each hash is looked up with a binary search: only for files sorted by hash
+def isHashListPwnedLocalSorted(list_records, l_local_db_file, l_outputfilename, l_checkpoint_file="", l_resume=False):
+    debugLog("isHashListPwnedLocalSorted(" + "list_records" + "," + l_local_db_file + "," + l_outputfilename + "," + l_checkpoint_file + "," + str(l_resume) + ")")
+    result= False #True if at least one password is found
+    total_records = len(list_records)
+    true_records  = 0
+    global g_number_of_password_read
+    global g_pwned_passwords_found
+    global g_safe_passwords_found
+    global g_scanned_lines_in_db
+
+    if l_resume:
+        #probing is quick, everything is checked again: the checkpoint is only used to trim the output file
+        readCheckpoint(l_checkpoint_file, list_records, l_local_db_file, l_outputfilename)
+
+    file_size = os.path.getsize(l_local_db_file)
+    with open(l_local_db_file, 'rb') as read_obj:
+        for current_record in list_records:
+            current_record.ispwned = findHashInSortedFile(current_record.src_hash.upper(), read_obj, file_size)
+            if current_record.ispwned:
+                result = True
+                true_records = true_records + 1
+                print(current_record.found_filename + "(" + str(current_record.found_linenumber) + ") -" + \
+                    current_record.src_password + " -" + current_record.src_hash + " FOUND in file " + l_local_db_file)
+    writeListOfRecords(l_outputfilename, list_records)
+    removeCheckpoint(l_checkpoint_file)
+    g_number_of_password_read = total_records
+    g_pwned_passwords_found   = true_records
+    g_safe_passwords_found    = g_number_of_password_read - g_pwned_passwords_found
+    g_scanned_lines_in_db     = 0
+    return result
+
 def checkListAgainstLineMT(list_records, l_line, thread_name):
     debugLog("checkListAgainstLineMT(" + "list_records" + "," + l_line+ "," + thread_name)
     number_of_true_records_found = 0
@@ -513,25 +887,254 @@ def isHashListPwnedLocalMT(list_records, l_local_db_file, l_outputfilename, l_in
     g_scanned_lines_in_db     = line_number #if local db option used
     return result
 
-def isHashPwnedRemote(l_hash):
+#web version of isHashListPwnedLocal: records are handled in prefix order, so each prefix is asked only once and
+#its answer dropped as soon as its records are checked. Each result is written as soon as it is known (so in
+#prefix order), a long run stopped half way keeps what it found. Requests are throttled by l_delay_secs.
+def isHashListPwnedRemote(list_records, l_outputfilename, l_delay_secs, l_checkpoint_file="", l_resume=False):
+    debugLog("isHashListPwnedRemote(" + "list_records" + "," + l_outputfilename + "," + str(l_delay_secs) + "," + l_checkpoint_file + "," + str(l_resume) + ")")
+    global g_pwned_passwords_found
+    global g_safe_passwords_found
+    sorted_position = 0  #records already checked, counted in prefix order (the checkpoint "input_position")
+    pwned_positions = []
+    last_checkpoint = time.time()
+
+    #positions in prefix order. The sort is stable, so the order is the same when resuming with the same input
+    prefix_order = sorted(range(len(list_records)), key=lambda position: list_records[position].src_hash[0:HASH_PREFIX_LENGHT].upper())
+
+    if l_resume:
+        db_offset, db_line, sorted_position, pwned_positions = readCheckpoint(l_checkpoint_file, list_records, "", l_outputfilename)
+        #the first sorted_position records in prefix order have been already checked in a previous run
+        resumed_pwned = len(pwned_positions)
+        g_pwned_passwords_found = g_pwned_passwords_found + resumed_pwned
+        g_safe_passwords_found  = g_safe_passwords_found + sorted_position - resumed_pwned
+
+    while sorted_position < len(prefix_order):
+        the_prefix = list_records[prefix_order[sorted_position]].src_hash[0:HASH_PREFIX_LENGHT].upper()
+        is_cached  = isRangeInWebCache(the_prefix)
+        the_range  = getRangeRemote(the_prefix)
+        while (sorted_position < len(prefix_order)) and \
+              (list_records[prefix_order[sorted_position]].src_hash[0:HASH_PREFIX_LENGHT].upper() == the_prefix):
+            position = prefix_order[sorted_position]
+            current  = list_records[position]
+            current.ispwned=isHashPwnedRemote(current.src_hash, the_range)
+            if current.ispwned:
+                pwned_positions.append(position)
+            writeOneRecord(l_outputfilename, current)
+            sorted_position = sorted_position + 1
+        the_range = None
+        if (time.time() - last_checkpoint >= CHECKPOINT_EVERY_SECS):
+            writeCheckpoint(l_checkpoint_file, list_records, pwned_positions, "", 0, 0, sorted_position, l_outputfilename)
+            last_checkpoint = time.time()
+        if not(is_cached):
+            time.sleep(l_delay_secs)
+            debugLog("Throttling requests by secs:" + str(l_delay_secs))
+    removeCheckpoint(l_checkpoint_file)
+    return
+
+#Opens (or creates) the sqlite file used to keep the web answers between runs
+def openWebCache(l_cache_file, l_ttl_secs=WEB_CACHE_TTL_SECS, l_max_bytes=WEB_CACHE_MAX_BYTES):
+    debugLog("openWebCache(" + l_cache_file + "," + str(l_ttl_secs) + "," + str(l_max_bytes) + ")")
+    global g_web_cache
+    global g_web_cache_ttl_secs
+    global g_web_cache_max_bytes
+
+    try:
+        #another run may be writing to the same file: wait for it instead of failing at once
+        g_web_cache = sqlite3.connect(l_cache_file, timeout=WEB_CACHE_BUSY_SECS)
+        #only effective on a new file: pages freed by webCacheEvict can then be given back to the file system
+        g_web_cache.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        g_web_cache.execute("PRAGMA synchronous=NORMAL")
+        g_web_cache.execute("CREATE TABLE IF NOT EXISTS ranges (prefix TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, " + \
+            "last_modified TEXT, fetched_at REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL)")
+        g_web_cache.execute("CREATE INDEX IF NOT EXISTS ranges_last_used ON ranges (last_used)")
+        g_web_cache.commit()
+        g_web_cache_ttl_secs  = l_ttl_secs
+        g_web_cache_max_bytes = l_max_bytes
+        debugLog("openWebCache: " + str(webCacheUsedBytes()) + " bytes in cache")
+    except sqlite3.Error as err:
+        webCacheFailed(err)
+    return
+
+#Any sqlite error (file locked for too long, not a sqlite file, disk full...) turns the cache off for the rest of
+#the run: the web service is still there, so the run goes on without the cache instead of stopping
+def webCacheFailed(l_error):
+    global g_web_cache
+    print("WARNING: web cache not usable (" + str(l_error) + ") - continuing without it")
+    if g_web_cache is not None:
+        try:
+            g_web_cache.close()
+        except sqlite3.Error:
+            pass
+    g_web_cache = None
+    g_web_cache_used.clear()
+    return
+
+def closeWebCache():
+    global g_web_cache
+    if g_web_cache is not None:
+        try:
+            webCacheFlushUsed()
+            g_web_cache.commit()
+            g_web_cache.close()
+        except sqlite3.Error as err:
+            webCacheFailed(err)
+        g_web_cache = None
+    return
+
+#Writes the last_used of the cache hits kept in memory. Part of the current transaction: the caller commits.
+#Cache hits do not write to the file one by one, so a run served from the cache does not keep the file locked.
+def webCacheFlushUsed():
+    if len(g_web_cache_used) > 0:
+        g_web_cache.executemany("UPDATE ranges SET last_used = ? WHERE prefix = ?", \
+            [(used_at, prefix) for prefix, used_at in g_web_cache_used.items()])
+        g_web_cache_used.clear()
+    return
+
+#Bytes of the cache file in use: answers plus sqlite pages and index overhead (free pages are reused, not counted)
+def webCacheUsedBytes():
+    page_count    = g_web_cache.execute("PRAGMA page_count").fetchone()[0]
+    freelist      = g_web_cache.execute("PRAGMA freelist_count").fetchone()[0]
+    page_size     = g_web_cache.execute("PRAGMA page_size").fetchone()[0]
+    return (page_count - freelist) * page_size
+
+#Returns (text, etag, last_modified, fetched_at) or None if the prefix is not in the cache (or -k not used)
+def webCacheLookup(l_prefix):
+    if g_web_cache is None:
+        return None
+    try:
+        row = g_web_cache.execute("SELECT body, etag, last_modified, fetched_at FROM ranges WHERE prefix = ?", (l_prefix,)).fetchone()
+        if row is None:
+            return None
+        #last_used is written later, WEB_CACHE_USED_FLUSH hits at a time (or with the next store, or on close)
+        g_web_cache_used[l_prefix] = time.time()
+        if len(g_web_cache_used) >= WEB_CACHE_USED_FLUSH:
+            webCacheFlushUsed()
+            g_web_cache.commit()
+    except sqlite3.Error as err:
+        webCacheFailed(err)
+        return None
+    return zlib.decompress(row[0]).decode('utf-8'), row[1], row[2], row[3]
+
+#True if the prefix is in the cache and not expired, i.e. it can be answered without any request
+def isRangeInWebCache(l_prefix):
+    if g_web_cache is None:
+        return False
+    try:
+        row = g_web_cache.execute("SELECT fetched_at FROM ranges WHERE prefix = ?", (l_prefix,)).fetchone()
+    except sqlite3.Error as err:
+        webCacheFailed(err)
+        return False
+    return (row is not None) and (time.time() - row[0] < g_web_cache_ttl_secs)
+
+def webCacheStore(l_prefix, l_text, l_etag, l_last_modified):
+    if g_web_cache is None:
+        return
+    body = zlib.compress(l_text.encode('utf-8'))
+    now  = time.time()
+    try:
+        g_web_cache.execute("INSERT OR REPLACE INTO ranges (prefix, body, etag, last_modified, fetched_at, last_used, size) VALUES (?, ?, ?, ?, ?, ?, ?)", \
+            (l_prefix, body, l_etag, l_last_modified, now, now, len(body)))
+        webCacheFlushUsed() #eviction needs to know what was used lately
+        if webCacheUsedBytes() > g_web_cache_max_bytes:
+            webCacheEvict()
+        g_web_cache.commit()
+    except sqlite3.Error as err:
+        webCacheFailed(err)
+    return
+
+#The web service confirmed (304) that the cached answer is still good: it is fresh again for another TTL
+def webCacheRevalidated(l_prefix, l_etag, l_last_modified):
+    if g_web_cache is None:
+        return
+    try:
+        g_web_cache.execute("UPDATE ranges SET fetched_at = ?, etag = ?, last_modified = ? WHERE prefix = ?", \
+            (time.time(), l_etag, l_last_modified, l_prefix))
+        g_web_cache.commit()
+    except sqlite3.Error as err:
+        webCacheFailed(err)
+    return
+
+#Removes the least recently used answers until the cache file is back to WEB_CACHE_EVICT_TO of its max size
+def webCacheEvict():
+    target_bytes = g_web_cache_max_bytes * WEB_CACHE_EVICT_TO
+    evicted = 0
+    while webCacheUsedBytes() > target_bytes:
+        removed = g_web_cache.execute("DELETE FROM ranges WHERE prefix IN (SELECT prefix FROM ranges ORDER BY last_used LIMIT ?)", \
+            (WEB_CACHE_EVICT_ROWS,)).rowcount
+        if removed <= 0:
+            break #empty: what is left is sqlite overhead
+        evicted = evicted + removed
+    g_web_cache.commit()
+    g_web_cache.execute("PRAGMA incremental_vacuum")
+    debugLog("webCacheEvict: " + str(evicted) + " answers removed, " + str(webCacheUsedBytes()) + " bytes in cache")
+    return
+
+#Returns (status_code, text) for /range/<l_prefix>. With -k a fresh cached answer is used without any request; an
+#expired one is revalidated (If-None-Match/If-Modified-Since, 304 means still good) and used as is if the web
+#service fails (e.g. rate limit or no network). WEB_STATUS_NO_ANSWER if the web service could not be reached.
+def getRangeRemote(l_prefix):
+    debugLog("getRangeRemote(" + l_prefix + ")")
+    global g_web_cache_hits
+    headers = {}
+    cached  = webCacheLookup(l_prefix)
+    if cached is not None:
+        cached_text, cached_etag, cached_last_modified, cached_fetched_at = cached
+        if (time.time() - cached_fetched_at) < g_web_cache_ttl_secs:
+            debugLog("getRangeRemote: " + l_prefix + " served from the web cache")
+            g_web_cache_hits = g_web_cache_hits + 1
+            return 200, cached_text
+        if cached_etag:
+            headers["If-None-Match"] = cached_etag
+        if cached_last_modified:
+            headers["If-Modified-Since"] = cached_last_modified
+
+    final_url = BASE_PWD_SEARCH_URL + l_prefix
+
+    try:
+        #WARNING_ verify=false added only on this local copy to avoid checking ssl certificate
+        response = requests.get(final_url, headers=headers, verify=SSL_CHECK, timeout=WEB_REQUEST_TIMEOUT)
+        status_code   = response.status_code
+        response_text = response.text
+    except requests.RequestException as err:
+        print("ERROR - web service not reachable for " + l_prefix + ": " + str(err))
+        response      = None
+        status_code   = WEB_STATUS_NO_ANSWER
+        response_text = ""
+
+    if status_code == 200:
+        webCacheStore(l_prefix, response_text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return 200, response_text
+    if cached is not None:
+        if status_code == 304:
+            debugLog("getRangeRemote: " + l_prefix + " not modified, cache refreshed")
+            webCacheRevalidated(l_prefix, response.headers.get("ETag", cached_etag), response.headers.get("Last-Modified", cached_last_modified))
+        else:
+            #not revalidated: used for this lookup only, it stays expired (last_used was updated by webCacheLookup)
+            print("No valid answer from the web service for " + l_prefix + " (status " + str(status_code) + ") - using the expired cached answer")
+        g_web_cache_hits = g_web_cache_hits + 1
+        return 200, cached_text
+    return status_code, response_text
+
+#l_range, if provided, is the (status_code, text) answer already downloaded for the prefix of l_hash
+def isHashPwnedRemote(l_hash, l_range=None):
     debugLog("isHashPwnedRemote(" + l_hash + ")")
     result = False
-    the_hashed_prefix = l_hash[0:(HASH_PREFIX_LENGHT)]
-    the_hashed_suffix = l_hash[HASH_PREFIX_LENGHT:len(l_hash)]
+    the_hashed_prefix = l_hash[0:(HASH_PREFIX_LENGHT)].upper()
+    the_hashed_suffix = l_hash[HASH_PREFIX_LENGHT:len(l_hash)].upper()
     global g_pwned_passwords_found
     global g_number_of_password_read
     global g_safe_passwords_found
     global g_safe_passwords_invalid
 
-    final_url = BASE_PWD_SEARCH_URL + the_hashed_prefix
-
-    #WARNING_ verify=false added only on this local copy to avoid checking ssl certificate
-    response = requests.get(final_url, verify=SSL_CHECK)
+    if l_range is not None:
+        status_code, response_text = l_range
+    else:
+        status_code, response_text = getRangeRemote(the_hashed_prefix)
 
-    if response.status_code == 200:
+    if status_code == 200:
         print('Web service returned success status 200')
-        #debugLog(response.text + "\n")
-        if (the_hashed_suffix in response.text):
+        #debugLog(response_text + "\n")
+        if (the_hashed_suffix in response_text):
             print(l_hash + " FOUND! This password is PWNED")
             result = True
             g_pwned_passwords_found    = g_pwned_passwords_found + 1
@@ -539,17 +1142,20 @@ def isHashPwnedRemote(l_hash):
             print(l_hash + " NOT FOUND! This password is SAFE")
             result = False
             g_safe_passwords_found    = g_safe_passwords_found + 1 
-    elif response.status_code == 404:
+    elif status_code == 404:
         print('ERROR 404 - Page not Found.')
         g_safe_passwords_invalid = g_safe_passwords_invalid+1
-    elif response.status_code == 429:
+    elif status_code == 429:
         print('ERROR 429 - rate limit exceeded. No Retry')
         g_safe_passwords_invalid = g_safe_passwords_invalid+1
-    elif response.status_code == 400:
+    elif status_code == 400:
         print('ERROR 400 - The hash prefix was not valid hexadecimal')
         g_safe_passwords_invalid = g_safe_passwords_invalid+1
+    elif status_code == WEB_STATUS_NO_ANSWER:
+        print('ERROR - No answer from the web service')
+        g_safe_passwords_invalid = g_safe_passwords_invalid+1
     else:
-        print('ERROR Unknown: ' + str(response.status_code) + ' ' + response.text)
+        print('ERROR Unknown: ' + str(status_code) + ' ' + response_text)
     
     return result
 
@@ -603,12 +1209,20 @@ cli_local_zip      = ""
 
 cli_output_file    = ""
 cli_delay_secs     = 0
+
+cli_checkpoint_file = ""
+cli_resume          = False
+
+cli_web_cache_file   = ""
+cli_cache_ttl_secs   = WEB_CACHE_TTL_SECS
+cli_cache_max_bytes  = WEB_CACHE_MAX_BYTES
+cli_cache_options    = False #--cache_ttl or --cache_max_mb used (only meaningful with -k)
 # Remove 1st argument from the list of command line arguments
 argumentList = sys.argv[1:]
 # Options
-options = "p:f:t:l:o:d:s:z:h"
+options = "p:f:t:il:o:d:sz:c:rk:h"
 # Long options
-long_options = ["password", "password_file", "text_file", "local_sha1_file", "output_file", "delay", "sha1_format","zipped", "help"]
+long_options = ["password", "password_file", "text_file", "stdin", "local_sha1_file", "output_file", "delay", "sha1_format","zipped", "checkpoint=", "resume", "web_cache=", "cache_ttl=", "cache_max_mb=", "sorted_db", "help"]
 
 try:
     debugLog("Parsing command line arguments....\n" + str(argumentList))
@@ -623,6 +1237,8 @@ try:
                 debugLog("-p " + currentValue + " found - Ignoring due to -t parameter found first....")
             elif current_operation_mode == IM_PASSWORD_FILE:
                 debugLog("-p " + currentValue + " found - Ignoring due to -f parameter found first....")
+            elif current_operation_mode == IM_STDIN:
+                debugLog("-p " + currentValue + " found - Ignoring due to -i parameter found first....")
             else:
                 cli_password   = currentValue
                 current_operation_mode = IM_SINGLE_PASSOWRD
@@ -633,6 +1249,8 @@ try:
                 debugLog("-f " + currentValue + " found - Ignoring due to -p parameter found first....")
             elif current_operation_mode == IM_PASSWORD_FILE:
                 debugLog("-f " + currentValue + " found - Ignoring due to -t parameter found first....")
+            elif current_operation_mode == IM_STDIN:
+                debugLog("-f " + currentValue + " found - Ignoring due to -i parameter found first....")
             else:
                 cli_password           = ""
                 current_operation_mode = IM_PASSWORD_FILE
@@ -644,11 +1262,21 @@ try:
                 debugLog("-t " + currentValue + " found - Ignoring due to -p parameter found first....")
             elif current_operation_mode == IM_PASSWORD_FILE:
                 debugLog("-t " + currentValue + " found - Ignoring due to -f parameter found first....")
+            elif current_operation_mode == IM_STDIN:
+                debugLog("-t " + currentValue + " found - Ignoring due to -i parameter found first....")
             else:
                 cli_password           = ""
                 current_operation_mode = IM_TEXT_FILE  
                 cli_text_file          = currentValue
 
+        elif currentArgument in ("-i", "--stdin"):
+            debugLog("-i found")
+            if current_operation_mode != IM_UNKNOWN_MODE:
+                debugLog("-i found - Ignoring due to -p, -f or -t parameter found first....")
+            else:
+                cli_password           = ""
+                current_operation_mode = IM_STDIN
+
         elif currentArgument in ("-s", "--sha1_format"):
             debugLog("-s found... assuming everyhing in SHA1 mode from now on...")
             cli_input_mode = OM_HASH
@@ -671,9 +1299,32 @@ try:
         elif currentArgument in ("-o", "--output_file"):
             debugLog("-o " + currentValue + " found")
             cli_output_file  = currentValue
-            if cli_output_file != "": #erase the file if it exists
-                outfile = open(cli_output_file, 'w', newline='\n')
-                outfile.close()
+
+        elif currentArgument in ("-c", "--checkpoint"):
+            debugLog("-c " + currentValue + " found")
+            cli_checkpoint_file = currentValue
+
+        elif currentArgument in ("-r", "--resume"):
+            debugLog("-r found... resuming from the last checkpoint")
+            cli_resume = True
+
+        elif currentArgument in ("-k", "--web_cache"):
+            debugLog("-k " + currentValue + " found")
+            cli_web_cache_file = currentValue
+
+        elif currentArgument == "--cache_ttl":
+            debugLog("--cache_ttl " + currentValue + " found")
+            cli_cache_ttl_secs = int(currentValue)
+            cli_cache_options  = True
+
+        elif currentArgument == "--cache_max_mb":
+            debugLog("--cache_max_mb " + currentValue + " found")
+            cli_cache_max_bytes = int(currentValue) * 1024 * 1024
+            cli_cache_options   = True
+
+        elif currentArgument == "--sorted_db":
+            debugLog("--sorted_db found... the local db can be searched with binary searches")
+            g_local_db_sorted = True
 
         elif currentArgument in ("-h", "--help"):
             showHelp()
@@ -696,6 +1347,28 @@ except getopt.error as err:
 
 #anykey("Press 'q' or Ctrl-C to quit or anything else to continue....")
 
+#checkpoints are only used by -f and -t: with -p or -i a previous -o file must not be kept
+if (cli_checkpoint_file != "" or cli_resume) and current_operation_mode not in (IM_PASSWORD_FILE, IM_TEXT_FILE):
+    print("WARNING: -c and -r only work with -f or -t, ignored")
+    cli_checkpoint_file = ""
+    cli_resume          = False
+
+#checkpoints are only written with -c, so there is nothing to resume from without it
+if cli_resume and cli_checkpoint_file == "":
+    print("-r needs the checkpoint file used in the previous run: -c ckpt_filename")
+    showHelpShort()
+    os._exit(ERR_WRONG_PARAMETERS)
+
+#erase the output file if it exists... unless resuming, the checkpoint knows how much of it is still good
+if cli_output_file != "" and not(cli_resume):
+    outfile = open(cli_output_file, 'w', newline='\n')
+    outfile.close()
+
+if cli_web_cache_file != "":
+    openWebCache(cli_web_cache_file, cli_cache_ttl_secs, cli_cache_max_bytes)
+elif cli_cache_options:
+    print("WARNING: --cache_ttl and --cache_max_mb are ignored without -k cache_filename")
+
 if current_operation_mode == IM_SINGLE_PASSOWRD:
     assert(not(cli_password==""))
     print("Searching for a single password...: " + cli_password)
@@ -706,23 +1379,35 @@ if current_operation_mode == IM_SINGLE_PASSOWRD:
 elif current_operation_mode == IM_PASSWORD_FILE:
     assert(not(cli_password_file==""))
     print("Searching for password file: " + cli_password_file)
-    checkPlainPasswordFile(cli_password_file, cli_db_mode, cli_local_db_file, cli_output_file, cli_input_mode, cli_delay_secs)
+    checkPlainPasswordFile(cli_password_file, cli_db_mode, cli_local_db_file, cli_output_file, cli_input_mode, cli_delay_secs, cli_checkpoint_file, cli_resume, cli_local_zip)
     printStats()
 
 elif current_operation_mode == IM_TEXT_FILE: 
     assert(not(cli_text_file==""))
     print("Searching for text file: " + cli_text_file)
     word_to_check_list=getPasswordList(cli_text_file)
-    checkTextFile(word_to_check_list, cli_db_mode, cli_local_db_file, cli_output_file, cli_delay_secs)
+    checkTextFile(word_to_check_list, cli_db_mode, cli_local_db_file, cli_output_file, cli_delay_secs, cli_checkpoint_file, cli_resume, cli_local_zip)
+    printStats()
+
+elif current_operation_mode == IM_STDIN:
+    #stdout only carries results: everything else printed from now on (progress, stats, messages) goes to stderr
+    result_stream = sys.stdout
+    sys.stdout    = sys.stderr
+    sys.stdin.reconfigure(errors='ignore')
+    print("Reading passwords from stdin, results on stdout...")
+    checkStream(sys.stdin, result_stream, cli_db_mode, cli_local_db_file, cli_local_zip, cli_output_file, cli_input_mode, cli_delay_secs)
     printStats()
 else:
-    print("UNKNOWN operation mode. this should NEVER happen. Need one of -p -f -t parameters. Use -h or --help to see usage")
+    print("UNKNOWN operation mode. this should NEVER happen. Need one of -p -f -t -i parameters. Use -h or --help to see usage")
     print("current arguments: "+ str(argumentList))
     printStats()
     print("PWNED - ver. " + PROGRAM_VERSION + " from A.R.")
     showHelpShort()
+    closeWebCache()
     os._exit(ERR_OPMODE_UNKNOWN)
 
+closeWebCache()
+
 if cli_output_file != "":
     print("Passwords and status are recorded to: " + cli_output_file)
     print("Remember to REMOVE THIS FILE!!!!!!!! it MAY contains your passwords.... ")